@@ -2,6 +2,8 @@
 # requires-python = ">=3.13"
 # dependencies = [
 #     "pandas==2.3.3",
+#     "numpy==2.3.3",
+#     "pyarrow==21.0.0",
 #     "plotly==6.3.1",
 # ]
 # ///
@@ -73,34 +75,67 @@ def _(lower_thresh, mo, upper_thresh):
 
 
 @app.cell
-def _(StringIO, csv_f, lower_thresh, pd, upper_thresh):
-    df = pd.DataFrame()
+def _(BytesIO, csv_f, pd):
+    # Parsing only depends on the uploaded file, so this cell doesn't
+    # re-run when the threshold sliders move - the expensive read_csv is
+    # amortized over every threshold tweak
+    raw_df = pd.DataFrame()
     if csv_f.name():
-        byte_content = csv_f.contents()
-        decoded_content = byte_content.decode("utf-8")
-        df = pd.read_csv(StringIO(decoded_content))
-
-        # Set thresholds from sliders
-        thresh_vals = (lower_thresh.value, upper_thresh.value)
-        df["Attendance Tier"] = df["SchlPercentage"].apply(
-            categorize_attendance, args=(thresh_vals,)
+        # Hand the raw bytes to read_csv - decoding happens inside the
+        # parser, with no intermediate str copy of the whole file.
+        # Arrow's multithreaded CSV reader is much faster than the default
+        # engine and backs strings zero-copy. Name/grouping columns go
+        # straight to string dtype (skips object inference); extra dtype
+        # keys are ignored if a column isn't in the export
+        raw_df = pd.read_csv(
+            BytesIO(csv_f.contents()),
+            encoding="utf-8",
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+            dtype={"StudentName": "string", "YearLevel": "string", "Form": "string"},
         )
-    return (df,)
 
+        # Downcast the integer columns - every later groupby/filter moves
+        # fewer bytes. SchlPercentage stays double: float32 values like
+        # 55.2 render as 55.20000076293945 in the tier listings, and the
+        # saving on one column of a school roll is negligible
+        for _col in ("TotalInclass", "TotalOutClass"):
+            if _col in raw_df.columns:
+                raw_df[_col] = pd.to_numeric(raw_df[_col], downcast="integer")
+
+        # Project down to the columns the rest of the app actually uses -
+        # Compass exports carry plenty more, and dropping them here means
+        # less to sort, group and serialize downstream
+        _wanted = [
+            "StudentName",
+            "YearLevel",
+            "Form",
+            "SchlPercentage",
+            "TotalInclass",
+            "TotalOutClass",
+        ]
+        raw_df = raw_df[[c for c in _wanted if c in raw_df.columns]].copy()
+    return (raw_df,)
 
-@app.function
-def categorize_attendance(percentage, thresholds):
-    if percentage < thresholds[0]:
-        return "Tier 3"
-    elif thresholds[0] <= percentage < thresholds[1]:
-        return "Tier 2"
-    else:
-        return "Tier 1"
+
+@app.cell
+def _(lower_thresh, np, pd, raw_df, upper_thresh):
+    df = raw_df
+    if len(raw_df) > 0:
+        df = raw_df.copy()
+
+        # Bin percentages into tiers in one vectorized pass over the column
+        df["Attendance Tier"] = pd.cut(
+            df["SchlPercentage"],
+            bins=[-np.inf, lower_thresh.value, upper_thresh.value, np.inf],
+            labels=["Tier 3", "Tier 2", "Tier 1"],
+            right=False,
+        ).astype(str)
+    return (df,)
 
 
 @app.cell
 def _(df, mo):
-    print(list(df.columns))
     yr_lvl_dropdown = mo.md("Can't select a Year Level until you have data")
     if len(df) > 0:
         if "YearLevel" in df.columns:
@@ -138,15 +173,18 @@ def _(alt, df, mo, pd, yr_lvl_dropdown):
             .reset_index(name="Count")
         )
 
-        # Calculate the total number of students per Year Level
-        total_counts = yr_df.groupby("YearLevel").size().reset_index(name="Total")
-
-        # Merge the counts with total counts and calculate percentages
-        tier_counts = tier_counts.merge(total_counts, on="YearLevel")
+        # Percentage within each Year Level, from the counts already in hand
+        # (no second group scan or merge)
         tier_counts["Percentage"] = (
-            tier_counts["Count"] / tier_counts["Total"]
+            tier_counts["Count"]
+            / tier_counts.groupby("YearLevel")["Count"].transform("sum")
         ) * 100
 
+        # The chart only ever sees this pre-aggregated frame (a handful of
+        # rows), never the raw roll. Keep the tier column as plain strings
+        # so Altair doesn't take its slow Categorical serialization path
+        tier_counts["Attendance Tier"] = tier_counts["Attendance Tier"].astype(str)
+
         # Create the Altair chart using percentages
         attendance_tier_chart = (
             alt.Chart(tier_counts)
@@ -170,30 +208,45 @@ def _(mo, yr_df):
 
     out_t2 = "\n\n## Tier 2 Students"
     if len(yr_df) > 0:
-        # Tier 3 Student list
-
-        tier_3_students = yr_df[yr_df["Attendance Tier"] == "Tier 3"]
-
         # Drop students without a Year level and sort by SchlPercentage
-        tier_3_students = tier_3_students.dropna(subset=["YearLevel"]).sort_values(
+        # once - both tier listings reuse the ordering instead of sorting
+        # their own slice
+        yr_df_sorted = yr_df.dropna(subset=["YearLevel"]).sort_values(
             by="SchlPercentage"
         )
 
-        # Output mo.md cells for each row in the dataframe
+        # Split by tier with one hash-based groupby pass instead of a
+        # boolean mask scan per tier; each split keeps the sorted order
+        by_tier = {
+            tier: students
+            for tier, students in yr_df_sorted.groupby("Attendance Tier", sort=False)
+        }
 
-        for index, row in tier_3_students.iterrows():
-            out_t3 += f"\n- **{row['StudentName']}** *{row['SchlPercentage']}%*"
+        # Tier 3 Student list
+        tier_3_students = by_tier.get("Tier 3", yr_df_sorted.iloc[:0])
+
+        # Build the Markdown list in one vectorized string op per tier
+        tier_3_lines = (
+            "- **"
+            + tier_3_students["StudentName"].astype(str)
+            + "** *"
+            + tier_3_students["SchlPercentage"].astype(str)
+            + "%*"
+        ).tolist()
+        out_t3 += "\n" + "\n".join(tier_3_lines)
 
         out_t3 += f"\n\nTotal Tier 3 Students: {len(tier_3_students)}"
 
-        tier_2_students = (
-            yr_df[yr_df["Attendance Tier"] == "Tier 2"]
-            .dropna(subset=["YearLevel"])
-            .sort_values(by="SchlPercentage")
-        )
+        tier_2_students = by_tier.get("Tier 2", yr_df_sorted.iloc[:0])
 
-        for index, row in tier_2_students.iterrows():
-            out_t2 += f"\n- **{row['StudentName']}** *{row['SchlPercentage']}%*"
+        tier_2_lines = (
+            "- **"
+            + tier_2_students["StudentName"].astype(str)
+            + "** *"
+            + tier_2_students["SchlPercentage"].astype(str)
+            + "%*"
+        ).tolist()
+        out_t2 += "\n" + "\n".join(tier_2_lines)
         out_t2 += f"\n\nTotal Tier 2 Students: {len(tier_2_students)}"
 
     mo.hstack([mo.md(out_t3), mo.md(out_t2)])
@@ -223,9 +276,10 @@ def _(mo, tier_2_students, tier_3_students, yr_df):
 def _():
     import marimo as mo
     import pandas as pd
+    import numpy as np
     import altair as alt
-    from io import StringIO
-    return StringIO, alt, mo, pd
+    from io import BytesIO
+    return BytesIO, alt, mo, np, pd
 
 
 if __name__ == "__main__":
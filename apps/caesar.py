@@ -11,21 +11,26 @@ def _(mo):
 
 
 @app.cell
-def _(mo):
+def _(mo, string):
     text_box = mo.ui.text(label="Text", value="")
     shift_box = mo.ui.number(label="Shift", value=3, start=-25, stop=25, step=1)
     encrypt = mo.ui.switch(label="Encrypt", value=True)
 
+    UP = string.ascii_uppercase
+    LO = string.ascii_lowercase
+
+    # The 26 translation tables are input-independent, so build them once
+    # instead of on every keystroke
+    caesar_tables = [
+        str.maketrans(UP + LO, UP[s:] + UP[:s] + LO[s:] + LO[:s])
+        for s in range(26)
+    ]
+
 
     def caesar_cipher(text, shift):
-        result = ""
-        for char in text:
-            if char.isalpha():
-                shift_base = ord("A") if char.isupper() else ord("a")
-                result += chr((ord(char) - shift_base + shift) % 26 + shift_base)
-            else:
-                result += char
-        return result
+        # translate runs as a single C loop over the string with an O(1)
+        # table lookup per character
+        return text.translate(caesar_tables[shift % 26])
 
 
     def caesar_decipher(text, shift):
@@ -33,7 +38,14 @@ def _(mo):
 
 
     mo.hstack([text_box, shift_box, encrypt])
-    return caesar_cipher, caesar_decipher, encrypt, shift_box, text_box
+    return (
+        caesar_cipher,
+        caesar_decipher,
+        caesar_tables,
+        encrypt,
+        shift_box,
+        text_box,
+    )
 
 
 @app.cell
@@ -48,20 +60,23 @@ def _(caesar_cipher, caesar_decipher, encrypt, mo, shift_box, text_box):
 
 
 @app.cell
-def _(caesar_cipher, mo, text_box):
-    # Output every possible option in a numbered markdown list
-    _out = ""
-    for _i in range(1, 26):
-        _out += f"1. {caesar_cipher(text_box.value, _i)} \n"
-
-    mo.md(_out)
+def _(caesar_tables, mo, text_box):
+    # Output every possible option in a numbered markdown list; only the
+    # final translate runs per reactive update
+    mo.md(
+        "\n".join(
+            f"1. {text_box.value.translate(caesar_tables[_i])} "
+            for _i in range(1, 26)
+        )
+    )
     return
 
 
 @app.cell
 def _():
     import marimo as mo
-    return (mo,)
+    import string
+    return mo, string
 
 
 if __name__ == "__main__":
@@ -6,12 +6,25 @@ app = marimo.App(width="full")
 with app.setup:
     import marimo as mo
     import pandas as pd
+    from dataclasses import dataclass
     from pathlib import Path
     from typing import Union, Optional, List, Dict
     import pytest
     import pandas as pd
+    import numpy as np
     import re
-    from rapidfuzz import fuzz, process
+
+    try:
+        from rapidfuzz import fuzz, process
+        _HAVE_RAPIDFUZZ = True
+    except ImportError:
+        # Stdlib fallback: similarity_matrix switches to
+        # difflib.SequenceMatcher when rapidfuzz isn't installed
+        from difflib import SequenceMatcher
+        _HAVE_RAPIDFUZZ = False
+
+    # Compiled once so the hot matching paths don't pay re.sub's cache lookup
+    _WS_RE = re.compile(r"\s+")
 
 
 @app.function
@@ -97,19 +110,118 @@ def standardize_name(name: Optional[str]) -> str:
     if name is None or (isinstance(name, str) and not name.strip()):
         return ""
 
-    # Convert to string (in case it's not already)
-    name = str(name)
+    # Lowercase, collapse whitespace runs, and trim in a single expression
+    # built around the precompiled regex
+    return _WS_RE.sub(" ", str(name).lower()).strip()
+
+
+@app.class_definition
+@dataclass
+class StudentRecords:
+    """
+    Structure-of-arrays view of the student roll.
+
+    Holds the original names, their standardized forms, and the N x 4
+    friend matrix (standardized) as flat arrays, so the matching pipeline
+    scans contiguous columns instead of indexing DataFrame rows. load_data
+    still returns the DataFrame - this is the internal layout built from
+    it once per matching run.
+
+    Attributes:
+        names (List[str]): Original student names, roll order
+        std_names (List[str]): Standardized student names, same order
+        friends (np.ndarray): N x 4 object array of standardized friend
+                              entries ('' where the cell was blank)
+    """
+
+    names: List[str]
+    std_names: List[str]
+    friends: np.ndarray
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "StudentRecords":
+        """
+        Build the columnar view from a load_data-style DataFrame.
+
+        Standardizes every name column in one vectorized pass (same rules
+        as standardize_name, which stays as the scalar API) instead of
+        calling a Python function per cell.
+        """
+        friend_columns = ['Friend 1', 'Friend 2', 'Friend 3', 'Friend 4']
+        clean = (
+            df[['Student Name'] + friend_columns]
+            .astype("string")
+            .fillna("")
+            .apply(
+                lambda col: col.str.lower()
+                .str.replace(r"\s+", " ", regex=True)
+                .str.strip()
+            )
+        )
+        return cls(
+            names=df['Student Name'].tolist(),
+            std_names=clean['Student Name'].tolist(),
+            friends=clean[friend_columns].to_numpy(),
+        )
+
+
+@app.function
+def similarity_matrix(
+    queries: List[str],
+    choices: List[str],
+    score_cutoff: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Score every query string against every choice string.
 
-    # Convert to lowercase
-    name = name.lower()
+    Thin dispatch around the batched scorer: rapidfuzz's process.cdist
+    when it is installed, otherwise a stdlib fallback built on
+    difflib.SequenceMatcher with autojunk=False (the same ratio family,
+    so thresholds keep their meaning). The fallback sets each choice as
+    seq2 once so SequenceMatcher's b2j reverse index is built per choice,
+    not per pair.
 
-    # Replace multiple spaces with single space
-    name = re.sub(r"\s+", " ", name)
+    Args:
+        queries (List[str]): Standardized names to match (matrix rows)
+        choices (List[str]): Standardized names to match against (columns)
+        score_cutoff (float, optional): If given, scores below the cutoff
+                                        come back as 0 - filter them, don't
+                                        compare them
 
-    # Strip leading and trailing whitespace
-    name = name.strip()
+    Returns:
+        np.ndarray: uint8 similarity matrix, scores 0-100
+    """
+    if _HAVE_RAPIDFUZZ:
+        return process.cdist(
+            queries,
+            choices,
+            scorer=fuzz.ratio,
+            dtype=np.uint8,
+            score_cutoff=score_cutoff,
+            workers=-1,
+        )
 
-    return name
+    scores = np.zeros((len(queries), len(choices)), dtype=np.uint8)
+    matcher = SequenceMatcher(autojunk=False)
+    for col, choice in enumerate(choices):
+        matcher.set_seq2(choice)
+        for row, query in enumerate(queries):
+            matcher.set_seq1(query)
+            # Cheap upper bounds first: real_quick_ratio is a pure
+            # length-difference bound and quick_ratio only counts common
+            # characters; both bound ratio from above, so a pair that
+            # can't reach the cutoff skips the full alignment entirely
+            # Rounding is monotone, so comparing rounded bounds against
+            # the cutoff matches how the stored uint8 scores are judged
+            if score_cutoff is not None and (
+                round(100.0 * matcher.real_quick_ratio()) < score_cutoff
+                or round(100.0 * matcher.quick_ratio()) < score_cutoff
+            ):
+                continue
+            score = round(100.0 * matcher.ratio())
+            if score_cutoff is None or score >= score_cutoff:
+                scores[row, col] = score
+    return scores
 
 
 @app.function
@@ -140,39 +252,136 @@ def build_friendship_graph(df: pd.DataFrame, threshold: float = 85.0) -> Dict[st
         >>> build_friendship_graph(df)
         {'Alice': ['Bob'], 'Bob': ['Alice']}
     """
+    scores, friend_entries, entry_rows, student_list = (
+        compute_friend_distance_matrix(df)
+    )
+    return threshold_graph(scores, friend_entries, entry_rows, student_list, threshold)
+
+
+@app.function
+def compute_friend_distance_matrix(
+    df: pd.DataFrame,
+) -> tuple:
+    """
+    Score every friend entry against every student name.
+
+    This is the expensive half of build_friendship_graph, and it is a pure
+    function of the data - the threshold plays no part - so callers (e.g.
+    a marimo cell behind mo.cache) can compute it once and re-threshold
+    cheaply as a slider moves.
+
+    Args:
+        df (pd.DataFrame): DataFrame with columns 'Student Name', 'Friend 1',
+                          'Friend 2', 'Friend 3', 'Friend 4'
+
+    Returns:
+        tuple: (scores, friend_entries, entry_rows, student_list) where
+               scores is a uint8 similarity matrix with one row per UNIQUE
+               standardized friend name and one column per student,
+               friend_entries is a list of unique (owning student,
+               standardized friend name) pairs, and entry_rows maps each
+               entry to its row in scores
+    """
+    # One conversion to the structure-of-arrays layout; everything below
+    # works off flat arrays rather than the DataFrame
+    records = StudentRecords.from_dataframe(df)
+    student_list = records.names
+    std_students = records.std_names
+
+    # Flatten the friend columns to one array and mask out the empties -
+    # no row iteration at all. ravel is row-major, so repeating each
+    # student's row index once per friend column keeps owners aligned
+    flat_friends = records.friends.ravel()
+    owner_idx = np.repeat(
+        np.arange(len(student_list)), records.friends.shape[1]
+    )
+    non_empty = flat_friends != ''
+    flat_clean = flat_friends[non_empty]
+    owner_idx = owner_idx[non_empty]
+
+    # No friends listed anywhere - nothing to score
+    if not len(flat_clean):
+        return (
+            np.zeros((0, len(student_list)), dtype=np.uint8),
+            [],
+            np.zeros(0, dtype=np.intp),
+            student_list,
+        )
+
+    # The same standardized name often appears in many cells (popular
+    # students) - score each unique string once. np.unique does the dedupe
+    # and the entry-to-row back-mapping in a single C pass; rows come out
+    # in sorted rather than first-seen order, which nothing downstream
+    # relies on
+    unique_arr, inverse_rows = np.unique(flat_clean, return_inverse=True)
+    unique_friends = unique_arr.tolist()
+
+    # A student who lists the same name in two friend columns must still
+    # contribute one edge, so dedupe (owner, friend) pairs - encoded as a
+    # single int per pair so np.unique does it in one C pass
+    pair_keys = np.unique(owner_idx * len(unique_friends) + inverse_rows)
+    entry_rows = (pair_keys % len(unique_friends)).astype(np.intp)
+    friend_entries = [
+        (student_list[owner], unique_friends[row])
+        for owner, row in zip(pair_keys // len(unique_friends), entry_rows)
+    ]
+
+    # Score every unique friend name against every student in one batched
+    # call. uint8 scores (0-100) keep the matrix small enough to stay in
+    # cache. No score_cutoff here - the matrix must stay
+    # threshold-independent to be cacheable
+    scores = similarity_matrix(unique_friends, std_students)
+    return scores, friend_entries, entry_rows, student_list
+
+
+@app.function
+def threshold_graph(
+    scores: np.ndarray,
+    friend_entries: List[tuple],
+    entry_rows: np.ndarray,
+    student_list: List[str],
+    threshold: float = 85.0,
+) -> Dict[str, List[str]]:
+    """
+    Turn a precomputed similarity matrix into a friendship graph.
+
+    The cheap half of build_friendship_graph: picks the best-scoring
+    student per unique friend name and keeps it for each entry if it
+    clears the threshold.
+
+    Args:
+        scores (np.ndarray): Similarity matrix from compute_friend_distance_matrix
+                             (one row per unique standardized friend name)
+        friend_entries (List[tuple]): (owning student, standardized name) pairs
+        entry_rows (np.ndarray): Row in scores for each friend entry
+        student_list (List[str]): Original student names (matrix columns)
+        threshold (float): Minimum similarity score (0-100) to accept a match
+
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping each student name to a list
+                              of their matched friends
+    """
     # Initialize graph with all students
-    graph = {student: [] for student in df['Student Name']}
-    
-    # Get list of all student names for matching
-    student_list = df['Student Name'].tolist()
-    
-    # Process each student's friends
-    for idx, row in df.iterrows():
-        student_name = row['Student Name']
-        
-        # Collect all friend names for this student
-        friend_columns = ['Friend 1', 'Friend 2', 'Friend 3', 'Friend 4']
-        friend_names = []
-        
-        for col in friend_columns:
-            friend_value = row[col]
-            # Only add non-empty friend names
-            if friend_value and str(friend_value).strip():
-                friend_names.append(str(friend_value).strip())
-        
-        # If student has no friends listed, continue to next student
-        if not friend_names:
-            continue
-        
-        # Match friend names to actual students using fuzzy matching
-        matches = fuzzy_match_friends(friend_names, student_list, threshold)
-        
-        # Add matched friends to the graph
-        for friend_input, matched_student in matches.items():
-            # Only add if match was found and it's not the student themselves
-            if matched_student and matched_student != student_name:
-                graph[student_name].append(matched_student)
-    
+    graph = {student: [] for student in student_list}
+
+    if not friend_entries:
+        return graph
+
+    # Best-scoring student per unique friend name, broadcast back to the
+    # entries through entry_rows
+    best_indices = scores.argmax(axis=1)
+    best_scores = scores[np.arange(scores.shape[0]), best_indices]
+
+    # The matrix holds rounded uint8 scores, so quantize the cutoff the
+    # same way - otherwise a true 85.4 loses to a threshold of 85.3
+    cutoff = round(threshold)
+
+    for (student_name, _), row in zip(friend_entries, entry_rows):
+        matched_student = student_list[best_indices[row]]
+        # Only add if match was found and it's not the student themselves
+        if best_scores[row] >= cutoff and matched_student != student_name:
+            graph[student_name].append(matched_student)
+
     return graph
 
 
@@ -198,151 +407,138 @@ def allocate_groups(
         List[List[str]]: List of groups, where each group is a list of student names
         
     Algorithm:
-        - Calculate target group size
-        - Sort students by number of friends (fewer friends = higher priority)
-        - Attempt to place each student in a group where they have a friend
-        - If not possible, place in smallest group
-        - Ensure groups stay within ±1 of target size
+        - Fix each group's size up front (total / num_groups, remainder
+          spread one-per-group), so balance holds by construction
+        - Fill one group at a time: seed with the unplaced student who has
+          the fewest unplaced friends, then repeatedly pull in the buffered
+          candidate (a friend of a current member) with the highest gain
+        - Gain = friends already in this group minus friends still waiting,
+          so students whose last chance at a friend is this group go first
     """
     students = df['Student Name'].tolist()
     total_students = len(students)
-    target_size = total_students // num_groups
-    max_size = target_size + (2 if total_students % num_groups > 0 else 0)
-    
-    # Initialize empty groups
+
+    # Fix group sizes up front: remainder students go one-per-group, so
+    # sizes never differ by more than 1
+    base_size = total_students // num_groups
+    remainder = total_students % num_groups
+    group_targets = [
+        base_size + (1 if group_idx < remainder else 0)
+        for group_idx in range(num_groups)
+    ]
+
+    # Map names to integer IDs and the friendship graph to CSR-style
+    # (indptr, indices) arrays so the placement loop juggles flat int
+    # arrays instead of dicts of name strings
+    id_of = {student: student_id for student_id, student in enumerate(students)}
+    indptr = np.zeros(total_students + 1, dtype=np.int32)
+    flat_friends: List[int] = []
+    for student_id, student in enumerate(students):
+        for friend in friendship_graph.get(student, []):
+            friend_id = id_of.get(friend)
+            if friend_id is not None:
+                flat_friends.append(friend_id)
+        indptr[student_id + 1] = len(flat_friends)
+    indices = np.asarray(flat_friends, dtype=np.int32)
+
+    group_of = allocate_group_ids(group_targets, indptr, indices)
+
+    # Map the ID-based assignment back to name lists
     groups: List[List[str]] = [[] for _ in range(num_groups)]
-    
-    # Create list of (student, num_friends) for prioritization
-    student_priority = []
-    for student in students:
-        num_friends = len(friendship_graph.get(student, []))
-        student_priority.append((student, num_friends))
-    
-    # Sort by number of friends (ascending) - students with fewer friends get priority
-    # This increases chances that students with few friends get their friend match
-    student_priority.sort(key=lambda x: x[1])
-    
-    # Track which students have been allocated
-    allocated = set()
-    
-    # First pass: Try to place students with their friends
-    for student, num_friends in student_priority:
-        if student in allocated:
-            continue
-            
-        friends = friendship_graph.get(student, [])
-        best_group = None
-        
-        # Try to find a group where this student has a friend
-        if friends:
-            for group_idx, group in enumerate(groups):
-                # Check if group has capacity
-                if len(group) >= max_size:
-                    continue
-                    
-                # Check if any friend is in this group
-                for friend in friends:
-                    if friend in group:
-                        best_group = group_idx
-                        break
-                
-                if best_group is not None:
-                    break
-        
-        # If we found a group with a friend and it has capacity, add there
-        if best_group is not None:
-            groups[best_group].append(student)
-            allocated.add(student)
-        else:
-            # Otherwise, add to the smallest group that has capacity
-            # Find group with minimum size that's below max_size
-            valid_groups = [(idx, len(group)) for idx, group in enumerate(groups) if len(group) < max_size]
-            
-            if valid_groups:
-                # Sort by size and take the smallest
-                valid_groups.sort(key=lambda x: x[1])
-                smallest_group_idx = valid_groups[0][0]
-                groups[smallest_group_idx].append(student)
-                allocated.add(student)
-    
-    # Second pass: Handle any remaining unallocated students (edge case)
-    # This shouldn't happen but just in case
-    for student in students:
-        if student not in allocated:
-            # Find smallest group
-            smallest_idx = min(range(num_groups), key=lambda i: len(groups[i]))
-            groups[smallest_idx].append(student)
-            allocated.add(student)
-    
-    # Final balancing pass: Try to balance groups within ±1 of target
-    # Move students from larger groups to smaller groups if it improves balance
-    # and doesn't break friend connections (optional enhancement)
-    balance_groups(groups, friendship_graph, target_size)
-    
+    for student_id, student in enumerate(students):
+        groups[group_of[student_id]].append(student)
+
     return groups
 
 
 @app.function
-def balance_groups(
-    groups: List[List[str]], 
-    friendship_graph: Dict[str, List[str]], 
-    target_size: int
-) -> None:
+def allocate_group_ids(
+    group_targets: List[int],
+    indptr: np.ndarray,
+    indices: np.ndarray,
+) -> np.ndarray:
     """
-    Helper function to balance group sizes while trying to preserve friend connections.
-    
-    Modifies groups in-place to achieve better balance.
-    
+    Core grouping loop over integer student IDs.
+
+    Fills one group at a time to its fixed target size using a buffered
+    max-gain heuristic: a group is seeded with the unplaced student who
+    has the fewest unplaced friends (they are the hardest to satisfy
+    later), and then grows by pulling in the buffered candidate - a friend
+    of a current member - whose gain is highest, where gain counts friends
+    already in the group minus friends still waiting to be placed. Balance
+    is guaranteed by the fixed targets, so no rebalancing pass is needed
+    afterwards.
+
     Args:
-        groups (List[List[str]]): The groups to balance
-        friendship_graph (Dict[str, List[str]]): Friendship connections
-        target_size (int): Target size for each group
+        group_targets (List[int]): Exact size each group must reach
+        indptr (np.ndarray): CSR row pointers, len num_students + 1
+        indices (np.ndarray): Flat friend IDs; student i's friends are
+                              indices[indptr[i]:indptr[i + 1]]
+
+    Returns:
+        np.ndarray: int32 array mapping each student ID to a group index
     """
-    max_iterations = 50
-    iteration = 0
-    
-    while iteration < max_iterations:
-        iteration += 1
-        
-        # Calculate current group sizes
-        sizes = [len(group) for group in groups]
-        max_size = max(sizes)
-        min_size = min(sizes)
-        
-        # If groups are balanced within ±1, we're done
-        if max_size - min_size <= 1:
-            break
-        
-        # Find largest and smallest groups
-        largest_idx = sizes.index(max_size)
-        smallest_idx = sizes.index(min_size)
-        
-        # Try to move a student from largest to smallest
-        # Prefer moving students who don't have friends in their current group
-        moved = False
-        
-        for student in groups[largest_idx][:]:  # Create a copy to iterate safely
-            friends = friendship_graph.get(student, [])
-            
-            # Check if student has friends in current group
-            has_friends_in_current = any(friend in groups[largest_idx] for friend in friends)
-            
-            # Check if student would have friends in new group
-            would_have_friends_in_new = any(friend in groups[smallest_idx] for friend in friends)
-            
-            # Move if: no friends in current group, OR would gain friends in new group
-            if not has_friends_in_current or would_have_friends_in_new:
-                groups[largest_idx].remove(student)
-                groups[smallest_idx].append(student)
-                moved = True
-                break
-        
-        # If we couldn't find a good candidate, just move anyone
-        if not moved and len(groups[largest_idx]) > 0:
-            student = groups[largest_idx].pop()
-            groups[smallest_idx].append(student)
-    
-    return None
+    num_students = len(indptr) - 1
+
+    # Each student is one bit in a Python int: adjacency, group membership
+    # and the unplaced pool are big-ints, so every intersection below is a
+    # single C-level '&' plus a popcount instead of a set operation
+    adjacency_bits = []
+    for student in range(num_students):
+        bits = 0
+        for friend in indices[indptr[student]:indptr[student + 1]]:
+            bits |= 1 << int(friend)
+        adjacency_bits.append(bits)
+
+    def iter_bits(bits: int):
+        # Yield the set bit positions, lowest first
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    unplaced = (1 << num_students) - 1
+    group_of = np.full(num_students, -1, dtype=np.int32)
+
+    for group_idx, target in enumerate(group_targets):
+        members = 0
+        # Buffer of candidates: everyone adjacent to a current member
+        buffer = 0
+        size = 0
+
+        while size < target and unplaced:
+            candidates = buffer & unplaced
+
+            if candidates:
+                # Highest gain first: friends already here minus friends
+                # still waiting (ties broken by ID for determinism)
+                pick = max(
+                    iter_bits(candidates),
+                    key=lambda student: (
+                        (adjacency_bits[student] & members).bit_count()
+                        - (adjacency_bits[student] & unplaced).bit_count(),
+                        -student,
+                    ),
+                )
+            else:
+                # (Re)seed with the unplaced student who has the fewest
+                # unplaced friends - hardest to satisfy if left for later
+                pick = min(
+                    iter_bits(unplaced),
+                    key=lambda student: (
+                        (adjacency_bits[student] & unplaced).bit_count(),
+                        student,
+                    ),
+                )
+
+            pick_bit = 1 << pick
+            members |= pick_bit
+            unplaced &= ~pick_bit
+            group_of[pick] = group_idx
+            buffer |= adjacency_bits[pick]
+            size += 1
+
+    return group_of
 
 
 @app.function
@@ -383,32 +579,52 @@ def validate_groups(
     validation['group_sizes'] = group_sizes
     validation['total_students'] = sum(group_sizes)
     
-    # Track friend counts for each student
-    friend_count_distribution = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0}
-    students_without_friends = []
-    total_friends_in_groups = 0
-    
-    # Analyze each group
-    for group in groups:
-        for student in group:
-            # Get this student's friends
-            student_friends = friendship_graph.get(student, [])
-            
-            # Count how many of their friends are in the same group
-            friends_in_group = [friend for friend in student_friends if friend in group]
-            num_friends_in_group = len(friends_in_group)
-            
-            # Track for average calculation
-            total_friends_in_groups += num_friends_in_group
-            
-            # Cap at 4 for distribution tracking
-            capped_count = min(num_friends_in_group, 4)
-            friend_count_distribution[capped_count] += 1
-            
-            # Track students with no friends
-            if num_friends_in_group == 0:
-                students_without_friends.append(student)
-    
+    # Give every placed student an integer ID and record their group index
+    # in a flat array - the sparse-matrix view of the allocation
+    placed_students = [student for group in groups for student in group]
+    student_ids = {student: sid for sid, student in enumerate(placed_students)}
+    group_of = np.fromiter(
+        (group_idx for group_idx, group in enumerate(groups) for _ in group),
+        dtype=np.int32,
+        count=len(placed_students),
+    )
+
+    # Friendship graph as flat (owner, friend) edge arrays, CSR-style
+    owner_ids: List[int] = []
+    friend_ids: List[int] = []
+    for student, sid in student_ids.items():
+        for friend in friendship_graph.get(student, []):
+            fid = student_ids.get(friend)
+            if fid is not None:
+                owner_ids.append(sid)
+                friend_ids.append(fid)
+
+    # One vectorized comparison marks the edges whose endpoints share a
+    # group; bincount folds those into a per-student friends-in-group
+    # count - no Python-level membership tests at all
+    if owner_ids:
+        owner_arr = np.asarray(owner_ids, dtype=np.int32)
+        friend_arr = np.asarray(friend_ids, dtype=np.int32)
+        same_group = group_of[owner_arr] == group_of[friend_arr]
+        friends_in_group_counts = np.bincount(
+            owner_arr[same_group], minlength=len(placed_students)
+        )
+    else:
+        friends_in_group_counts = np.zeros(len(placed_students), dtype=np.int64)
+
+    # Histogram the counts (capped at 4 for the distribution) and total
+    # them in C; only the usually-short zero-friend name list needs
+    # Python-level indexing
+    hist = np.bincount(
+        np.clip(friends_in_group_counts, 0, 4), minlength=5
+    )
+    friend_count_distribution = {count: int(hist[count]) for count in range(5)}
+    total_friends_in_groups = int(friends_in_group_counts.sum())
+    students_without_friends = [
+        placed_students[sid]
+        for sid in np.flatnonzero(friends_in_group_counts == 0)
+    ]
+
     validation['students_with_friends'] = friend_count_distribution
     validation['students_with_0_friends'] = friend_count_distribution[0]
     validation['students_without_friends_list'] = students_without_friends
@@ -466,42 +682,48 @@ def fuzzy_match_friends(
     if not friend_names:
         return matches
 
-    # Create list of tuples: (original_student_name, standardized_student_name)
-    student_pairs = [
-        (student, standardize_name(student)) for student in student_list
-    ]
-    standardized_students = [pair[1] for pair in student_pairs]
+    # Standardize the student names once
+    std_students = [standardize_name(student) for student in student_list]
 
-    for friend_name in friend_names:
-        # Skip empty friend names
-        if not friend_name or not friend_name.strip():
-            continue
-
-        # Standardize the friend name
-        std_friend_name = standardize_name(friend_name)
-
-        # Skip if standardized name is empty
-        if not std_friend_name:
-            continue
+    # Keep only friend names that survive standardization; blank entries
+    # are skipped entirely, as before
+    valid_friends = [
+        (friend_name, standardize_name(friend_name))
+        for friend_name in friend_names
+        if friend_name and friend_name.strip()
+    ]
+    valid_friends = [pair for pair in valid_friends if pair[1]]
 
-        # Find best match using rapidfuzz
-        # process.extractOne returns a tuple (match, score, index) or None
-        result = process.extractOne(
-            std_friend_name,
-            standardized_students,
-            scorer=fuzz.ratio,
-            score_cutoff=threshold,
-        )
+    if not valid_friends:
+        return matches
 
-        # If a match was found above threshold
-        if result is not None:
-            # Extract the index from the result
-            index = result[2]
-            # Map back to the original student name using the index
-            matches[friend_name] = student_pairs[index][0]
-        else:
-            # No match found above threshold
-            matches[friend_name] = None
+    # Scores come back as rounded uint8, so quantize the cutoff the same
+    # way - pruning and acceptance then agree with each other and with
+    # threshold_graph
+    cutoff = round(threshold)
+
+    # Score all friends against all students in one batched call instead
+    # of re-entering the scorer per friend. The score_cutoff lets the
+    # scorer abandon pairs once their upper bound falls below the
+    # threshold; pruned pairs come back as 0
+    scores = similarity_matrix(
+        [std_friend for _, std_friend in valid_friends],
+        std_students,
+        score_cutoff=cutoff,
+    )
+
+    # Best-scoring student per friend; rows without a surviving score
+    # don't need an argmax at all and map straight to None
+    best_scores = scores.max(axis=1)
+    has_match = best_scores >= cutoff
+    best_indices = np.zeros(len(valid_friends), dtype=np.intp)
+    if has_match.any():
+        best_indices[has_match] = scores[has_match].argmax(axis=1)
+
+    for (friend_name, _), match_idx, matched in zip(
+        valid_friends, best_indices, has_match
+    ):
+        matches[friend_name] = student_list[match_idx] if matched else None
 
     return matches
 
@@ -175,6 +175,34 @@ class TestFriendshipGraph:
         graph = build_friendship_graph(df, threshold=85)
         assert graph['Alice'] == []
 
+    def test_duplicate_friend_entries_give_one_edge(self):
+        """Test that listing the same friend twice produces a single edge"""
+        df = pd.DataFrame({
+            'Student Name': ['Alice', 'Bob'],
+            'Friend 1': ['Bob', ''],
+            'Friend 2': ['Bob', ''],
+            'Friend 3': [''] * 2,
+            'Friend 4': [''] * 2
+        })
+        graph = build_friendship_graph(df, threshold=85)
+        assert graph['Alice'] == ['Bob']
+
+    def test_difflib_fallback_matches_rapidfuzz(self, sample_df, monkeypatch):
+        """Test the stdlib SequenceMatcher fallback builds the same graph"""
+        import class_allocation
+        from difflib import SequenceMatcher
+
+        rapidfuzz_graph = build_friendship_graph(sample_df, threshold=85)
+
+        # Force similarity_matrix down the difflib path
+        monkeypatch.setattr(class_allocation, '_HAVE_RAPIDFUZZ', False)
+        monkeypatch.setattr(
+            class_allocation, 'SequenceMatcher', SequenceMatcher, raising=False
+        )
+        fallback_graph = build_friendship_graph(sample_df, threshold=85)
+
+        assert fallback_graph == rapidfuzz_graph
+
 
 # Test 5: Group Allocation
 class TestGroupAllocation: